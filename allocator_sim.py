@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Offline allocator simulator
+
+Discrete-event simulation that drives the real DockerRuntimeAllocator and
+RuntimeRegistry against a fake Docker backend, to size warm pools, idle TTLs
+and container caps without a Docker daemon.
+
+The fake backend models container start latency (lognormal around a median),
+a warm pool of pre-booted containers that make starts cheap, and random start
+failures. Arrivals come from a synthetic generator (new users, return visits,
+`rbt_advanced` mix) or from a recorded JSON-lines trace.
+
+Reports allocation latency percentiles, container-hours and eviction churn.
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import docker
+
+from docker_allocator import DockerHost, DockerRuntimeAllocator, NoCapacityError
+from port_allocator import HostPortAllocator
+from runtime_registry import RuntimeRegistry
+from tracing import Tracer
+
+
+# --- Fake Docker backend ------------------------------------------------------
+
+
+class SimClock:
+    def __init__(self):
+        self.now = 0.0
+
+
+class FakeContainer:
+    def __init__(self, backend: "FakeDockerClient", container_id: str, name: str, labels: Dict[str, str]):
+        self._backend = backend
+        self.id = container_id
+        self.name = name
+        self.labels = labels
+        self.attrs: Dict[str, Any] = {}
+        self.status = "running"
+        self.started_at = backend.clock.now
+
+    def reload(self):
+        pass
+
+    def stop(self):
+        self.status = "exited"
+
+    def remove(self, force: bool = False):
+        self._backend._remove(self)
+
+
+class FakeContainers:
+    """The subset of `DockerClient.containers` the allocator uses."""
+
+    def __init__(self, backend: "FakeDockerClient"):
+        self._backend = backend
+
+    def run(self, image: str, detach: bool = True, name: str = None, labels=None, **kwargs):
+        return self._backend._run(name, labels or {})
+
+    def list(self, all: bool = False, filters: Optional[Dict[str, str]] = None):
+        label = (filters or {}).get("label")
+        if label is None or label == "rbt.managed=1":
+            found = list(self._backend.containers_by_id.values())
+        else:
+            key, _, value = label.partition("=")
+            if key == "rbt.user_id":
+                container = self._backend.containers_by_user.get(value)
+                found = [container] if container else []
+            else:
+                found = [
+                    c for c in self._backend.containers_by_id.values()
+                    if c.labels.get(key) == value
+                ]
+        # like Docker, only running containers unless all=True
+        return found if all else [c for c in found if c.status == "running"]
+
+    def get(self, id_or_name: str):
+        backend = self._backend
+        container = backend.containers_by_id.get(id_or_name) or backend.containers_by_name.get(id_or_name)
+        if container is None:
+            raise docker.errors.NotFound(f"No such container: {id_or_name}")
+        return container
+
+
+class FakeDockerClient:
+    """
+    In-memory stand-in for a Docker daemon.
+
+    Every `containers.run` adds its simulated cost to `pending_latency`; the
+    simulator drains it with take_latency() after each allocation, so the
+    allocator itself runs in real time while its cost is charged to the
+    simulated clock.
+    """
+
+    def __init__(
+        self,
+        clock: Optional[SimClock] = None,
+        rng: Optional[random.Random] = None,
+        start_latency: float = 1.5,
+        start_jitter: float = 0.35,
+        warm_start_latency: float = 0.05,
+        warm_pool: int = 0,
+        failure_rate: float = 0.0,
+        id_prefix: str = "fake",
+    ):
+        self.clock = clock or SimClock()
+        self.rng = rng or random.Random()
+        self.start_latency = start_latency
+        self.start_jitter = start_jitter
+        self.warm_start_latency = warm_start_latency
+        self.warm_pool = warm_pool
+        self.failure_rate = failure_rate
+        self.containers = FakeContainers(self)
+
+        self.containers_by_id: Dict[str, FakeContainer] = {}
+        self.containers_by_name: Dict[str, FakeContainer] = {}
+        self.containers_by_user: Dict[str, FakeContainer] = {}
+        # times at which each warm-pool slot is (again) booted and claimable
+        self._warm_ready_at: List[float] = [0.0] * warm_pool
+        self._ids = itertools.count(1)
+        # distinct per daemon when several fakes stand in for a fleet
+        self.id_prefix = id_prefix
+
+        self.pending_latency = 0.0
+        self.starts = 0
+        self.warm_hits = 0
+        self.failures = 0
+        self.removals = 0
+        self.container_seconds = 0.0
+
+    def take_latency(self) -> float:
+        latency, self.pending_latency = self.pending_latency, 0.0
+        return latency
+
+    def cold_start_latency(self) -> float:
+        # lognormal with the configured median; jitter is sigma in log space
+        return self.start_latency * math.exp(self.rng.gauss(0.0, self.start_jitter))
+
+    def _run(self, name: str, labels: Dict[str, str]) -> FakeContainer:
+        now = self.clock.now
+        if self._warm_ready_at and self._warm_ready_at[0] <= now:
+            # Claim a booted pool container; its slot refills after a cold boot
+            heapq.heapreplace(self._warm_ready_at, now + self.cold_start_latency())
+            self.pending_latency += self.warm_start_latency
+            self.warm_hits += 1
+        else:
+            self.pending_latency += self.cold_start_latency()
+
+        if self.failure_rate and self.rng.random() < self.failure_rate:
+            self.failures += 1
+            raise docker.errors.APIError("simulated container start failure")
+
+        if name in self.containers_by_name:
+            raise docker.errors.APIError(f"Conflict. The container name {name!r} is already in use")
+
+        container = FakeContainer(self, f"{self.id_prefix}{next(self._ids):012d}", name, dict(labels))
+        self.containers_by_id[container.id] = container
+        self.containers_by_name[name] = container
+        user_id = labels.get("rbt.user_id")
+        if user_id:
+            self.containers_by_user[user_id] = container
+        self.starts += 1
+        return container
+
+    def _remove(self, container: FakeContainer):
+        if self.containers_by_id.pop(container.id, None) is None:
+            return
+        self.containers_by_name.pop(container.name, None)
+        user_id = container.labels.get("rbt.user_id")
+        if self.containers_by_user.get(user_id) is container:
+            del self.containers_by_user[user_id]
+        self.removals += 1
+        self.container_seconds += self.clock.now - container.started_at
+
+    def total_container_seconds(self) -> float:
+        """Container time so far, including live and warm-pool containers."""
+        now = self.clock.now
+        live = sum(now - c.started_at for c in self.containers_by_id.values())
+        return self.container_seconds + live + self.warm_pool * now
+
+
+# --- Arrival traces -----------------------------------------------------------
+
+
+def synthetic_trace(
+    users: int = 2000,
+    visits: int = 10000,
+    duration: float = 86400.0,
+    return_rate: float = 0.6,
+    advanced_mix: float = 0.2,
+    session_mean: float = 600.0,
+    rng: Optional[random.Random] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Poisson arrivals over `duration` seconds. Each visit is a return visit by
+    an already-seen user with probability `return_rate` (while fewer than
+    `users` have been seen; always afterwards), otherwise a new user.
+    """
+    rng = rng or random.Random()
+    rate = visits / duration
+    seen: List[str] = []
+    advanced: Dict[str, bool] = {}
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate)
+        if t >= duration:
+            return
+        if seen and (len(seen) >= users or rng.random() < return_rate):
+            user_id = rng.choice(seen)
+        else:
+            user_id = f"user-{len(seen):06d}"
+            seen.append(user_id)
+            advanced[user_id] = rng.random() < advanced_mix
+        yield {
+            "t": t,
+            "user_id": user_id,
+            "advanced": advanced[user_id],
+            "session": rng.expovariate(1.0 / session_mean),
+        }
+
+
+def load_trace(path: str) -> Iterator[Dict[str, Any]]:
+    """Recorded trace: JSON lines with t, user_id, and optional advanced/session."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_trace(trace: Iterable[Dict[str, Any]], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        for visit in trace:
+            f.write(json.dumps(visit) + "\n")
+
+
+# --- Simulation ---------------------------------------------------------------
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def simulate(
+    trace: Iterable[Dict[str, Any]],
+    idle_ttl: float = 1800.0,
+    max_containers: Optional[int] = None,
+    warm_pool: int = 0,
+    start_latency: float = 1.5,
+    start_jitter: float = 0.35,
+    warm_start_latency: float = 0.05,
+    failure_rate: float = 0.0,
+    max_retries: int = 3,
+    retry_backoff: float = 1.0,
+    session_default: float = 600.0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Replay `trace` (visits sorted by `t`) through a real allocator.
+
+    A visit allocates (or reuses) the user's runtime and keeps it busy for
+    the visit's session length. A runtime idle for `idle_ttl` seconds is
+    released. If `max_containers` is reached, the least recently active
+    runtime is evicted to make room.
+
+    A visit that still has no runtime after its retries, or that finds no
+    capacity, counts as failed. The time it spent trying is included in the
+    latency percentiles and also reported on its own.
+    """
+    rng = random.Random(seed)
+    clock = SimClock()
+    backend = FakeDockerClient(
+        clock=clock,
+        rng=rng,
+        start_latency=start_latency,
+        start_jitter=start_jitter,
+        warm_start_latency=warm_start_latency,
+        warm_pool=warm_pool,
+        failure_rate=failure_rate,
+    )
+    # One simulated daemon, sized so the cap (not ports) limits placement
+    capacity = max_containers or 60000
+    host = DockerHost(
+        "sim", backend, capacity=capacity, ports=HostPortAllocator(1024, capacity)
+    )
+    allocator = DockerRuntimeAllocator(
+        hosts=[host],
+        boot_wait=0,
+        registry=RuntimeRegistry(clock=lambda: clock.now),
+        # Allocation spans are not interesting here and cost real time
+        tracer=Tracer("sim", sample_rate=0.0),
+    )
+
+    # user_id -> end of the latest session; a runtime is idle after that
+    busy_until: Dict[str, float] = {}
+    idle_checks: List = []  # (due, seq, user_id)
+    seq = itertools.count()
+
+    latencies: List[float] = []
+    cold_latencies: List[float] = []
+    failed_latencies: List[float] = []
+    peak_runtimes = 0
+    idle_evictions = 0
+    cap_evictions = 0
+    failed_visits = 0
+    visits = 0
+    started = time.perf_counter()
+
+    def run_idle_checks(until: float):
+        nonlocal idle_evictions
+        while idle_checks and idle_checks[0][0] <= until:
+            due, _, user_id = heapq.heappop(idle_checks)
+            last = busy_until.get(user_id)
+            if last is not None and last + idle_ttl <= due:
+                clock.now = due
+                allocator.release(user_id)
+                del busy_until[user_id]
+                idle_evictions += 1
+
+    for visit in trace:
+        t = float(visit["t"])
+        run_idle_checks(t)
+        clock.now = t
+        user_id = visit["user_id"]
+        visits += 1
+
+        if (
+            max_containers is not None
+            and user_id not in busy_until
+            and len(busy_until) >= max_containers
+        ):
+            victim = allocator.registry.least_recently_active().user_id
+            allocator.release(victim)
+            del busy_until[victim]
+            cap_evictions += 1
+
+        signature = {"user_id": user_id, "has_advanced_cookie": bool(visit.get("advanced"))}
+        cold = allocator.registry.get(user_id) is None
+        latency = 0.0
+        allocated = False
+        for attempt in range(max_retries + 1):
+            try:
+                allocator.allocate(signature)
+                latency += backend.take_latency()
+                allocated = True
+                break
+            except NoCapacityError:
+                break  # retrying cannot help until something is released
+            except docker.errors.APIError:
+                latency += backend.take_latency() + retry_backoff * (2 ** attempt)
+
+        latencies.append(latency)
+        if not allocated:
+            failed_visits += 1
+            failed_latencies.append(latency)
+            continue
+        if cold:
+            cold_latencies.append(latency)
+
+        session = float(visit.get("session", session_default))
+        busy_until[user_id] = max(busy_until.get(user_id, 0.0), t + latency + session)
+        heapq.heappush(idle_checks, (busy_until[user_id] + idle_ttl, next(seq), user_id))
+        peak_runtimes = max(peak_runtimes, len(busy_until))
+
+    end = clock.now
+    run_idle_checks(end)
+    clock.now = end
+
+    latencies.sort()
+    cold_latencies.sort()
+    failed_latencies.sort()
+    hours = max(clock.now, 1e-9) / 3600.0
+    evictions = idle_evictions + cap_evictions
+    return {
+        "visits": visits,
+        "failed_visits": failed_visits,
+        "simulated_hours": clock.now / 3600.0,
+        "wall_seconds": time.perf_counter() - started,
+        "latency_p50": _percentile(latencies, 50),
+        "latency_p90": _percentile(latencies, 90),
+        "latency_p99": _percentile(latencies, 99),
+        "cold_starts": len(cold_latencies),
+        "cold_latency_p50": _percentile(cold_latencies, 50),
+        "cold_latency_p99": _percentile(cold_latencies, 99),
+        "failed_latency_p50": _percentile(failed_latencies, 50),
+        "failed_latency_p99": _percentile(failed_latencies, 99),
+        "peak_runtimes": peak_runtimes,
+        "warm_pool_hits": backend.warm_hits,
+        "start_failures": backend.failures,
+        "container_hours": backend.total_container_seconds() / 3600.0,
+        "idle_evictions": idle_evictions,
+        "cap_evictions": cap_evictions,
+        "evictions_per_hour": evictions / hours,
+        "starts_per_hour": backend.starts / hours,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    trace_group = parser.add_argument_group("arrivals")
+    trace_group.add_argument("--trace", help="replay a recorded JSON-lines trace")
+    trace_group.add_argument("--write-trace", help="save the synthetic trace to this path")
+    trace_group.add_argument("--users", type=int, default=2000)
+    trace_group.add_argument("--visits", type=int, default=10000)
+    trace_group.add_argument("--hours", type=float, default=24.0)
+    trace_group.add_argument("--return-rate", type=float, default=0.6)
+    trace_group.add_argument("--advanced-mix", type=float, default=0.2)
+    trace_group.add_argument("--session-mean", type=float, default=600.0)
+
+    policy = parser.add_argument_group("policy")
+    policy.add_argument("--idle-ttl", type=float, default=1800.0)
+    policy.add_argument("--max-containers", type=int, default=None)
+    policy.add_argument("--warm-pool", type=int, default=0)
+
+    backend = parser.add_argument_group("backend")
+    backend.add_argument("--start-latency", type=float, default=1.5, help="median cold start (s)")
+    backend.add_argument("--start-jitter", type=float, default=0.35, help="lognormal sigma")
+    backend.add_argument("--warm-start-latency", type=float, default=0.05)
+    backend.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        trace = load_trace(args.trace)
+    else:
+        trace = synthetic_trace(
+            users=args.users,
+            visits=args.visits,
+            duration=args.hours * 3600.0,
+            return_rate=args.return_rate,
+            advanced_mix=args.advanced_mix,
+            session_mean=args.session_mean,
+            rng=random.Random(args.seed),
+        )
+        if args.write_trace:
+            trace = list(trace)
+            write_trace(trace, args.write_trace)
+
+    report = simulate(
+        trace,
+        idle_ttl=args.idle_ttl,
+        max_containers=args.max_containers,
+        warm_pool=args.warm_pool,
+        start_latency=args.start_latency,
+        start_jitter=args.start_jitter,
+        warm_start_latency=args.warm_start_latency,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+
+    print("🧪 Allocator simulation")
+    print("=" * 50)
+    print(f"Visits:               {report['visits']} over {report['simulated_hours']:.1f} h "
+          f"(simulated in {report['wall_seconds']:.2f} s)")
+    print(f"Allocation latency:   p50 {report['latency_p50'] * 1000:.0f} ms, "
+          f"p90 {report['latency_p90'] * 1000:.0f} ms, p99 {report['latency_p99'] * 1000:.0f} ms")
+    print(f"Cold starts:          {report['cold_starts']} "
+          f"(p50 {report['cold_latency_p50'] * 1000:.0f} ms, p99 {report['cold_latency_p99'] * 1000:.0f} ms, "
+          f"warm-pool hits {report['warm_pool_hits']})")
+    print(f"Start failures:       {report['start_failures']} ({report['failed_visits']} visits failed"
+          + (f", p50 {report['failed_latency_p50'] * 1000:.0f} ms / p99 "
+             f"{report['failed_latency_p99'] * 1000:.0f} ms before giving up)"
+             if report["failed_visits"] else ")"))
+    print(f"Peak runtimes:        {report['peak_runtimes']}")
+    print(f"Container-hours:      {report['container_hours']:.1f}")
+    print(f"Evictions:            {report['idle_evictions']} idle, {report['cap_evictions']} cap "
+          f"({report['evictions_per_hour']:.1f}/h, {report['starts_per_hour']:.1f} starts/h)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Redirect vs proxy benchmark for the gateway
+
+Starts one runtime and two gateways (GATEWAY_MODE=redirect and =proxy)
+locally, then simulates browsers: each user gets its own HTTP client and
+loads the entry page a number of times. Reports per page-load latency and
+how many TCP connections each user's client had to open.
+
+- redirect: gateway 307 → runtime /start (two origins per user)
+- proxy:    gateway streams /start from the runtime (one origin per user;
+            upstream connections are pooled by the gateway and shared)
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from startup_profile import spawn_uvicorn, stop_process, wait_for_health
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class _ConnectionCounter:
+    """
+    Counts TCP connects a client makes, via httpcore's per-request trace
+    extension; unlike the pool's size at the end, this includes connections
+    that were opened and later closed.
+    """
+
+    def __init__(self):
+        self.opened = 0
+
+    async def _trace(self, event_name: str, info: Dict):
+        if event_name == "connection.connect_tcp.complete":
+            self.opened += 1
+
+    async def on_request(self, request: httpx.Request):
+        request.extensions["trace"] = self._trace
+
+
+async def _run_user(gateway_url: str, loads: int, latencies: List[float]) -> int:
+    counter = _ConnectionCounter()
+    async with httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=10.0,
+        event_hooks={"request": [counter.on_request]},
+    ) as client:
+        for _ in range(loads):
+            start = time.perf_counter()
+            response = await client.get(gateway_url + "/")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+    return counter.opened
+
+
+async def _run_mode(gateway_url: str, users: int, loads: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_user():
+        async with semaphore:
+            return await _run_user(gateway_url, loads, latencies)
+
+    start = time.perf_counter()
+    connections = await asyncio.gather(*(one_user() for _ in range(users)))
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "throughput": len(latencies) / elapsed,
+        "connections_per_user": statistics.mean(connections),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--loads", type=int, default=10, help="page loads per user")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port-base", type=int, default=8100)
+    args = parser.parse_args(argv)
+
+    runtime_port = args.port_base
+    ports = {"redirect": args.port_base + 1, "proxy": args.port_base + 2}
+    secrets = {
+        "FERNET_KEY": base64.urlsafe_b64encode(os.urandom(32)).decode("ascii"),
+        "JWT_SIGNING_SECRET": base64.urlsafe_b64encode(os.urandom(32)).decode("ascii"),
+        "TRACE_SAMPLE_RATE": "0",
+    }
+
+    processes = [spawn_uvicorn("runtime_app:app", runtime_port, env=secrets)]
+    for mode, port in ports.items():
+        env = {
+            **secrets,
+            "GATEWAY_MODE": mode,
+            "USE_DOCKER_ALLOCATOR": "false",
+            "RUNTIME_HOST": "127.0.0.1",
+            "RUNTIME_PORT": str(runtime_port),
+        }
+        processes.append(spawn_uvicorn("gateway_app:app", port, env=env))
+
+    try:
+        for proc, port in zip(processes, [runtime_port, *ports.values()]):
+            if wait_for_health(f"http://127.0.0.1:{port}/health", proc, time.perf_counter()) is None:
+                print(f"❌ service on port {port} did not become healthy")
+                return 1
+
+        print(f"📊 {args.users} users × {args.loads} page loads, concurrency {args.concurrency}")
+        print("=" * 72)
+        print(f"{'mode':<10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'mean ms':>9}{'req/s':>9}{'conns/user':>12}")
+        for mode, port in ports.items():
+            result = asyncio.run(
+                _run_mode(f"http://127.0.0.1:{port}", args.users, args.loads, args.concurrency)
+            )
+            print(
+                f"{mode:<10}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{result['mean_ms']:>9.2f}"
+                f"{result['throughput']:>9.0f}{result['connections_per_user']:>12.1f}"
+            )
+    finally:
+        for proc in processes:
+            stop_process(proc)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+RuntimeRegistry benchmark
+
+Compares the indexed, slot-backed RuntimeRegistry with the previous layout
+(one plain dict per user, lookups by anything but user_id scan every entry)
+at a large user count. Reports memory per entry and lookup latency.
+
+"row B" is the size of one stored record; "bytes/entry" is everything the
+registry allocates per user, including its indexes (field values such as
+ids and URLs are shared with the caller and not counted).
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from runtime_registry import RuntimeRegistry
+
+
+class DictRegistry:
+    """The registry before indexing: user_id → plain dict, scans for the rest."""
+
+    def __init__(self):
+        self._store: Dict[str, Dict] = {}
+
+    def set(self, user_id: str, runtime_info: Dict, last_activity: float):
+        self._store[user_id] = {**runtime_info, "last_activity": last_activity}
+
+    def get(self, user_id: str):
+        return self._store.get(user_id)
+
+    def by_container_id(self, container_id: str):
+        return next((r for r in self._store.values() if r["container_id"] == container_id), None)
+
+    def by_runtime_url(self, runtime_url: str):
+        return next((r for r in self._store.values() if r["runtime_url"] == runtime_url), None)
+
+    def with_features(self, features):
+        return (r for r in self._store.values() if r["features"] == list(features))
+
+    def idle_since(self, cutoff: float):
+        return sorted(
+            (r for r in self._store.values() if r["last_activity"] < cutoff),
+            key=lambda r: r["last_activity"],
+        )
+
+
+def _runtime_infos(count: int, rng: random.Random) -> List[Dict]:
+    infos = []
+    for i in range(count):
+        features = ["basic", "advanced"] if rng.random() < 0.2 else ["basic"]
+        infos.append(
+            {
+                "user_id": f"user-{i:07d}",
+                "container_id": f"{rng.getrandbits(256):064x}",
+                "runtime_url": f"http://localhost:{9000 + i % 50000}/{i}",
+                "internal_url": f"http://rbt-runtime-user-{i:07d}:8001",
+                "features": features,
+                "host_port": 9000 + i % 50000,
+                "host": "local",
+            }
+        )
+    return infos
+
+
+def _measure_build(factory: Callable, infos: List[Dict]):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    registry = factory()
+    for i, info in enumerate(infos):
+        registry.set(info["user_id"], info, last_activity=float(i))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return registry, allocated / len(infos)
+
+
+def _time_per_call(fn: Callable, args: List, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(args[i % len(args)])
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--scan-lookups", type=int, default=20,
+                        help="lookups for the scanning baseline")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    infos = _runtime_infos(args.users, rng)
+    sample = [infos[rng.randrange(len(infos))] for _ in range(1000)]
+    cutoff = args.users * 0.001  # the oldest 0.1% are "idle"
+
+    print(f"📦 RuntimeRegistry at {args.users:,} users")
+    print("=" * 72)
+    print(f"{'layout':<10}{'row B':>7}{'bytes/entry':>12}{'get µs':>10}{'container µs':>14}"
+          f"{'url µs':>10}{'features ms':>13}{'idle ms':>10}")
+
+    for name, factory, lookups in (
+        ("dict", DictRegistry, args.scan_lookups),
+        ("indexed", RuntimeRegistry, args.lookups),
+    ):
+        registry, per_entry = _measure_build(factory, infos)
+        row = sys.getsizeof(registry.get(infos[0]["user_id"]))
+        get_s = _time_per_call(registry.get, [i["user_id"] for i in sample], args.lookups)
+        container_s = _time_per_call(
+            registry.by_container_id, [i["container_id"] for i in sample], lookups
+        )
+        url_s = _time_per_call(registry.by_runtime_url, [i["runtime_url"] for i in sample], lookups)
+        features_s = _time_per_call(
+            lambda f, r=registry: sum(1 for _ in r.with_features(f)), [("basic", "advanced")], 5
+        )
+        idle_s = _time_per_call(lambda c, r=registry: list(r.idle_since(c)), [cutoff], 5)
+        print(
+            f"{name:<10}{row:>7}{per_entry:>12.0f}{get_s * 1e6:>10.2f}{container_s * 1e6:>14.2f}"
+            f"{url_s * 1e6:>10.2f}{features_s * 1e3:>13.2f}{idle_s * 1e3:>10.3f}"
+        )
+        del registry  # free it before the next layout is built
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# port_allocator.py
+import os
+import threading
+from typing import Optional, Tuple
+
+
+DEFAULT_TOOL_SPEC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool_spec.0.1.0.yaml")
+DEFAULT_PORT_COUNT = 1000
+
+
+class PortExhaustedError(Exception):
+    pass
+
+
+class HostPortAllocator:
+    """
+    Host ports for runtime containers, handed out by the gateway.
+
+    The range [port_base, port_base + size) is a bitmap held in a single int.
+    Claiming takes the lowest free bit (`~bits & (bits + 1)`), releasing
+    clears it; neither scans the range. Safe to share between threads.
+    """
+
+    def __init__(self, port_base: int, size: int = DEFAULT_PORT_COUNT):
+        if size <= 0:
+            raise ValueError("size must be positive")
+        self.port_base = port_base
+        self.size = size
+        self._bits = 0
+        self._claimed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def claimed(self) -> int:
+        """Number of ports currently claimed."""
+        return self._claimed
+
+    def in_range(self, port: int) -> bool:
+        return self.port_base <= port < self.port_base + self.size
+
+    def claim(self) -> int:
+        with self._lock:
+            lowest_free = ~self._bits & (self._bits + 1)
+            index = lowest_free.bit_length() - 1
+            if index >= self.size:
+                raise PortExhaustedError(
+                    f"all {self.size} ports from {self.port_base} are in use"
+                )
+            self._bits |= lowest_free
+            self._claimed += 1
+            return self.port_base + index
+
+    def mark_claimed(self, port: int) -> bool:
+        """
+        Claim a specific port, e.g. one found on a container label after a
+        gateway restart. Returns False if it is outside the range or taken.
+        """
+        if not self.in_range(port):
+            return False
+        mask = 1 << (port - self.port_base)
+        with self._lock:
+            if self._bits & mask:
+                return False
+            self._bits |= mask
+            self._claimed += 1
+            return True
+
+    def release(self, port: int):
+        if not self.in_range(port):
+            return
+        mask = 1 << (port - self.port_base)
+        with self._lock:
+            if self._bits & mask:
+                self._bits &= ~mask
+                self._claimed -= 1
+
+    def is_claimed(self, port: int) -> bool:
+        return self.in_range(port) and bool(self._bits & (1 << (port - self.port_base)))
+
+
+def load_port_range(
+    spec_path: str = DEFAULT_TOOL_SPEC,
+    count: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Read `port_base` / `port_offset` from the tool spec.
+
+    The spec is flat `key: value` YAML, so it is read line by line rather than
+    adding a YAML dependency. RUNTIME_PORT_BASE / RUNTIME_PORT_COUNT override.
+    Returns (first_port, count).
+    """
+    values = {}
+    try:
+        with open(spec_path, encoding="utf-8") as f:
+            for line in f:
+                key, sep, value = line.partition(":")
+                if sep and key.strip() in ("port_base", "port_offset"):
+                    values[key.strip()] = int(value.strip().strip("\"'"))
+    except FileNotFoundError:
+        pass
+
+    first_port = values.get("port_base", 9000) + values.get("port_offset", 0)
+    first_port = int(os.environ.get("RUNTIME_PORT_BASE", first_port))
+    if count is None:
+        count = int(os.environ.get("RUNTIME_PORT_COUNT", DEFAULT_PORT_COUNT))
+    return first_port, count
@@ -0,0 +1,216 @@
+# proxy.py
+import asyncio
+from typing import Iterable, List, Optional, Tuple
+
+import httpx
+from fastapi import Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+
+
+# Headers that describe a single connection and must not be forwarded
+HOP_BY_HOP_HEADERS = frozenset(
+    {
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+        "host",
+    }
+)
+
+
+# Set by this hop; an incoming X-Forwarded-For is chained, the others kept
+FORWARDED_HEADERS = frozenset({"x-forwarded-for", "x-forwarded-proto", "x-forwarded-host"})
+
+
+class RuntimeUnreachable(Exception):
+    """The upstream runtime could not be connected to (gone, or not up yet)."""
+
+
+def _filter_headers(raw: Iterable[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    return [(k, v) for k, v in raw if k.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS]
+
+
+class RuntimeProxy:
+    """
+    Streams browser traffic to a runtime over the internal network.
+
+    - One pooled, keep-alive AsyncClient is shared by every user, so the
+      gateway holds a handful of upstream connections per runtime instead
+      of the browser opening its own.
+    - Request and response bodies are streamed chunk by chunk.
+    - WebSockets are relayed frame by frame.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 512,
+        max_keepalive_connections: int = 128,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+    ):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = httpx.Timeout(timeout, connect=5.0)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=self._limits,
+                timeout=self._timeout,
+                follow_redirects=False,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _upstream_headers(self, request: Request) -> List[Tuple[bytes, bytes]]:
+        headers = [
+            (k, v) for k, v in _filter_headers(request.headers.raw)
+            if k.decode("latin-1").lower() not in FORWARDED_HEADERS
+        ]
+        client_host = request.client.host if request.client else "unknown"
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            client_host = f"{forwarded_for}, {client_host}"
+        headers.append((b"x-forwarded-for", client_host.encode("latin-1")))
+        # A proxy in front of us knows the original scheme and host better
+        scheme = {"ws": "http", "wss": "https"}.get(request.url.scheme, request.url.scheme)
+        proto = request.headers.get("x-forwarded-proto", scheme)
+        headers.append((b"x-forwarded-proto", proto.encode("latin-1")))
+        host = request.headers.get("x-forwarded-host", request.headers.get("host"))
+        if host:
+            headers.append((b"x-forwarded-host", host.encode("latin-1")))
+        return headers
+
+    async def forward(
+        self,
+        request: Request,
+        upstream_base: str,
+        path: str,
+        query: str = "",
+        extra_headers: Optional[List[Tuple[bytes, bytes]]] = None,
+    ) -> Response:
+        """
+        Send `request` to `upstream_base + path` and stream the reply back.
+
+        `extra_headers` are added to the response, e.g. a routing cookie.
+        Raises RuntimeUnreachable if the runtime cannot be reached.
+        """
+        url = f"{upstream_base.rstrip('/')}/{path.lstrip('/')}"
+        if query:
+            url = f"{url}?{query}"
+
+        # Only stream a body when the client actually sent one; an empty
+        # streamed body would turn every GET into a chunked request.
+        has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+        upstream_request = self.client.build_request(
+            request.method,
+            url,
+            headers=self._upstream_headers(request),
+            content=request.stream() if has_body else None,
+        )
+        try:
+            upstream = await self.client.send(upstream_request, stream=True)
+        except httpx.TransportError as e:
+            raise RuntimeUnreachable(type(e).__name__) from e
+
+        response = StreamingResponse(
+            upstream.aiter_raw(),
+            status_code=upstream.status_code,
+            background=BackgroundTask(upstream.aclose),
+        )
+        # Keep repeated headers (Set-Cookie) intact.
+        response.raw_headers = _filter_headers(upstream.headers.raw) + (extra_headers or [])
+        return response
+
+    async def forward_websocket(
+        self,
+        websocket: WebSocket,
+        upstream_base: str,
+        path: str,
+        query: str = "",
+    ):
+        """
+        Relay a WebSocket session to the runtime until either side closes.
+
+        The client's headers (Cookie, Origin, User-Agent, X-Forwarded-*) go
+        along on the upstream handshake; the handshake's own Sec-WebSocket-*
+        headers are negotiated afresh. Raises RuntimeUnreachable, before
+        the client is accepted, if the runtime cannot be reached.
+        """
+        import websockets
+
+        url = f"{upstream_base.rstrip('/')}/{path.lstrip('/')}"
+        url = "ws" + url[len("http"):] if url.startswith("http") else url
+        if query:
+            url = f"{url}?{query}"
+
+        headers = [
+            (k.decode("latin-1"), v.decode("latin-1"))
+            for k, v in self._upstream_headers(websocket)
+            if not k.decode("latin-1").lower().startswith("sec-websocket-")
+        ]
+        subprotocols = websocket.scope.get("subprotocols") or None
+        try:
+            upstream = await websockets.connect(
+                url,
+                subprotocols=subprotocols,
+                additional_headers=headers,
+                user_agent_header=None,
+                open_timeout=self._timeout.connect,
+            )
+        except (OSError, websockets.InvalidHandshake, websockets.InvalidURI) as e:
+            raise RuntimeUnreachable(type(e).__name__) from e
+
+        async with upstream:
+            await websocket.accept(subprotocol=upstream.subprotocol)
+
+            async def client_to_upstream():
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        await upstream.close()
+                        return
+                    if message.get("bytes") is not None:
+                        await upstream.send(message["bytes"])
+                    else:
+                        await upstream.send(message.get("text") or "")
+
+            async def upstream_to_client():
+                async for data in upstream:
+                    if isinstance(data, bytes):
+                        await websocket.send_bytes(data)
+                    else:
+                        await websocket.send_text(data)
+                try:
+                    await websocket.close()
+                except WebSocketDisconnect:
+                    pass  # client left first
+
+            tasks = [
+                asyncio.create_task(client_to_upstream()),
+                asyncio.create_task(upstream_to_client()),
+            ]
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            for task in done:
+                error = task.exception()
+                if error is not None and not isinstance(
+                    error, (websockets.ConnectionClosed, WebSocketDisconnect)
+                ):
+                    raise error
@@ -1,11 +1,17 @@
 # runtime_app.py
+import time
+
 from fastapi import FastAPI, Request, HTTPException, Query
 from fastapi.responses import JSONResponse, HTMLResponse
 
-from security import decode_nested_token, TokenValidationError
+from tracing import SpanContext, get_tracer
+
+# `security` (and with it PyJWT / cryptography) is imported on the first
+# /start request, not here. Cold start only pays for what /health needs.
 
 
 app = FastAPI(title="Runtime Service")
+tracer = get_tracer("runtime")
 
 
 @app.get("/start")
@@ -17,12 +23,30 @@ async def start(request: Request, token: str = Query(...)):
     - Decrypts + verifies it
     - Extracts claims (user_id, features, runtime_id, etc.)
     - Sets its own notion of 'session' (cookie, local store, etc.)
+
+    The trace context minted by the gateway is only known once the token is
+    decrypted, so the decode span is recorded retroactively.
     """
+    started_ns = time.time_ns()
+    from security import decode_nested_token, TokenValidationError
+
     try:
         claims = decode_nested_token(token)
     except TokenValidationError as e:
+        span = tracer.start_span("runtime.start", start_ns=started_ns)
+        span.set_attribute("error", str(e))
+        span.end()
         raise HTTPException(status_code=401, detail=str(e))
+    decoded_ns = time.time_ns()
+
+    parent = SpanContext.from_traceparent(claims.get("traceparent"))
+    with tracer.start_span("runtime.start", parent=parent, start_ns=started_ns):
+        tracer.start_span("runtime.decode_token", start_ns=started_ns).end(decoded_ns)
+        with tracer.start_span("runtime.render"):
+            return _render(claims)
+
 
+def _render(claims):
     user_id = claims.get("user_id")
     features = claims.get("features") or []
     runtime_id = claims.get("runtime_id")
@@ -1,23 +1,225 @@
 # runtime_registry.py
-from typing import Optional, Dict
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+# Feature lists repeat across users ("basic", "basic+advanced", ...), so each
+# distinct set is stored once as a tuple and shared by every record.
+_FEATURE_SETS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _intern_features(features) -> Tuple[str, ...]:
+    key = tuple(features or ())
+    return _FEATURE_SETS.setdefault(key, key)
+
+
+class RuntimeRecord(Mapping):
+    """
+    One user's runtime. Fixed fields live in __slots__; anything else an
+    allocator stores goes into `extra`, which is only created when needed.
+
+    Reads like the dict it replaces (record["runtime_url"], record.get(...)).
+    Treat it as read-only: indexed fields must be changed through
+    RuntimeRegistry.set() so the indexes stay correct.
+    """
+
+    __slots__ = (
+        "user_id",
+        "container_id",
+        "runtime_url",
+        "internal_url",
+        "host_port",
+        "host",
+        "features",
+        "last_activity",
+        "extra",
+    )
+    _FIELDS = __slots__[:-1]
+
+    def __init__(self, runtime_info: Mapping, last_activity: float):
+        extra = None
+        for key, value in runtime_info.items():
+            if key in self._FIELDS:
+                continue
+            if extra is None:
+                extra = {}
+            extra[key] = value
+        self.user_id = runtime_info.get("user_id")
+        self.container_id = runtime_info.get("container_id")
+        self.runtime_url = runtime_info.get("runtime_url")
+        self.internal_url = runtime_info.get("internal_url")
+        self.host_port = runtime_info.get("host_port")
+        self.host = runtime_info.get("host")
+        self.features = _intern_features(runtime_info.get("features"))
+        self.last_activity = last_activity
+        self.extra = extra
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        count = sum(1 for key in self._FIELDS if getattr(self, key) is not None)
+        return count + (len(self.extra) if self.extra is not None else 0)
+
+    def __repr__(self) -> str:
+        return f"RuntimeRecord({dict(self)!r})"
+
 
 class RuntimeRegistry:
     """
     Simple in-memory registry.
     Replace with Redis or PostgreSQL when scaling.
+
+    Records are indexed by container_id, runtime_url and feature set, and
+    the main store itself is kept in last-activity order, so none of those
+    lookups scans every user. The activity order is touch order: timestamps
+    passed to set()/touch() must not go backwards. By default they come
+    from `clock`.
+
+    Allocations run on worker threads, so every update and every lookup
+    that walks more than one record holds a lock. Lookups that return
+    several records return a snapshot, not a live iterator.
     """
-    def __init__(self):
-        self._store: Dict[str, Dict] = {}  # user_id → runtime_info
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        # user_id → runtime record, least recently active first
+        self._store: "OrderedDict[str, RuntimeRecord]" = OrderedDict()
+        self._by_container: Dict[str, RuntimeRecord] = {}
+        self._by_url: Dict[str, RuntimeRecord] = {}
+        # feature tuple → user_id → record (a dict used as an ordered set)
+        self._by_features: Dict[Tuple[str, ...], Dict[str, RuntimeRecord]] = {}
+        self._lock = threading.RLock()
 
-    def get(self, user_id: str) -> Optional[Dict]:
+    def get(self, user_id: str) -> Optional[RuntimeRecord]:
         return self._store.get(user_id)
 
-    def set(self, user_id: str, runtime_info: Dict):
-        self._store[user_id] = runtime_info
+    def set(
+        self,
+        user_id: str,
+        runtime_info: Mapping,
+        last_activity: Optional[float] = None,
+    ) -> RuntimeRecord:
+        if last_activity is None:
+            last_activity = self.clock()
+        record = RuntimeRecord(runtime_info, last_activity)
+        if record.user_id is None:
+            record.user_id = user_id
+
+        with self._lock:
+            self._remove(user_id)
+            self._store[user_id] = record
+            if record.container_id is not None:
+                self._by_container[record.container_id] = record
+            if record.runtime_url is not None:
+                self._by_url[record.runtime_url] = record
+            self._by_features.setdefault(record.features, {})[user_id] = record
+        return record
 
-    def remove(self, user_id: str):
-        self._store.pop(user_id, None)
+    def remove(self, user_id: str) -> Optional[RuntimeRecord]:
+        """Drop the user's record and return it (None if there was none)."""
+        with self._lock:
+            return self._remove(user_id)
+
+    def _remove(self, user_id: str) -> Optional[RuntimeRecord]:
+        record = self._store.pop(user_id, None)
+        if record is None:
+            return None
+        if self._by_container.get(record.container_id) is record:
+            del self._by_container[record.container_id]
+        if self._by_url.get(record.runtime_url) is record:
+            del self._by_url[record.runtime_url]
+        users = self._by_features.get(record.features)
+        if users is not None:
+            users.pop(user_id, None)
+            if not users:
+                del self._by_features[record.features]
+        return record
+
+    def touch(self, user_id: str, now: Optional[float] = None):
+        """Mark the user's runtime as active now."""
+        with self._lock:
+            record = self._store.get(user_id)
+            if record is None:
+                return
+            record.last_activity = self.clock() if now is None else now
+            self._store.move_to_end(user_id)
 
     def all(self):
-        return list(self._store.values())
+        """
+        Live view of every record; does not copy. Iterate it only while no
+        other thread is allocating; otherwise use snapshot().
+        """
+        return self._store.values()
+
+    def snapshot(self) -> List[RuntimeRecord]:
+        """Every record, copied under the lock."""
+        with self._lock:
+            return list(self._store.values())
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._store
+
+    def __iter__(self) -> Iterator[RuntimeRecord]:
+        return iter(self._store.values())
+
+    # ------------------------------
+    # Secondary lookups
+    # ------------------------------
+    def by_container_id(self, container_id: str) -> Optional[RuntimeRecord]:
+        return self._by_container.get(container_id)
+
+    def by_runtime_url(self, runtime_url: str) -> Optional[RuntimeRecord]:
+        return self._by_url.get(runtime_url)
+
+    def with_features(self, features) -> Iterator[RuntimeRecord]:
+        """Records whose feature set is exactly `features` (order matters)."""
+        with self._lock:
+            users = self._by_features.get(tuple(features))
+            return iter(list(users.values()) if users else ())
+
+    def on_host(self, host: str) -> List[RuntimeRecord]:
+        """
+        Records owned by the Docker host named `host`. Scans every record:
+        there are only a few hosts, so an index would hold a second entry
+        per user for a rare lookup.
+        """
+        with self._lock:
+            return [record for record in self._store.values() if record.host == host]
+
+    def least_recently_active(self) -> Optional[RuntimeRecord]:
+        with self._lock:
+            if not self._store:
+                return None
+            return next(iter(self._store.values()))
 
+    def idle_since(self, cutoff: float) -> List[RuntimeRecord]:
+        """
+        Records with no activity since `cutoff`, oldest first. Stops at the
+        first active record, so cost is proportional to the result.
+        """
+        idle = []
+        with self._lock:
+            for record in self._store.values():
+                if record.last_activity >= cutoff:
+                    break
+                idle.append(record)
+        return idle
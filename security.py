@@ -1,23 +1,33 @@
 # security.py
 import os
-import base64
-import json
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Dict, Any
 
-import jwt
-from cryptography.fernet import Fernet, InvalidToken as FernetInvalidToken
+# PyJWT and cryptography are imported inside the functions that need them.
+# Importing this module stays cheap so a cold runtime can answer /health
+# before paying for the crypto stack.
 
 
 # In real life, load these from env or secret manager
 JWT_SIGNING_SECRET = os.environ.get("JWT_SIGNING_SECRET", "dev-signing-secret-change-me")
 FERNET_KEY = os.environ.get("FERNET_KEY")
 
-if not FERNET_KEY:
-    # For dev only. In prod, generate once and store safely.
-    FERNET_KEY = Fernet.generate_key().decode("ascii")
 
-fernet = Fernet(FERNET_KEY.encode("ascii")) if isinstance(FERNET_KEY, str) else Fernet(FERNET_KEY)
+@lru_cache(maxsize=1)
+def get_fernet():
+    """
+    Build the Fernet instance on first use.
+
+    If FERNET_KEY is unset a key is generated here rather than at import.
+    For dev only. In prod, generate once and store safely.
+    """
+    from cryptography.fernet import Fernet
+
+    key = FERNET_KEY
+    if not key:
+        key = Fernet.generate_key()
+    return Fernet(key.encode("ascii")) if isinstance(key, str) else Fernet(key)
 
 
 def _now_utc() -> datetime:
@@ -36,6 +46,8 @@ def create_nested_token(
     Result: opaque string safe to hand to the browser,
     but only your services can decrypt & verify it.
     """
+    import jwt
+
     now = _now_utc()
     payload = {
         "sub": subject,
@@ -58,7 +70,7 @@ def create_nested_token(
         jws_bytes = jws
 
     # Step 2: Encrypt (JWE-style)
-    encrypted = fernet.encrypt(jws_bytes)
+    encrypted = get_fernet().encrypt(jws_bytes)
 
     # Return as url-safe str
     return encrypted.decode("ascii")
@@ -74,9 +86,12 @@ def decode_nested_token(token: str) -> Dict[str, Any]:
     2. Verify the JWT signature and expiration.
     3. Return the claims.
     """
+    import jwt
+    from cryptography.fernet import InvalidToken as FernetInvalidToken
+
     try:
         encrypted_bytes = token.encode("ascii")
-        jws_bytes = fernet.decrypt(encrypted_bytes)
+        jws_bytes = get_fernet().decrypt(encrypted_bytes)
     except (FernetInvalidToken, ValueError) as e:
         raise TokenValidationError("Invalid encrypted token") from e
 
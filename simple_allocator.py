@@ -12,6 +12,10 @@ class SimpleRuntimeAllocator:
     def __init__(self, runtime_url: str = "http://runtime:8001"):
         self.runtime_url = runtime_url
 
+    def peek(self, user_signature: Dict[str, Any]) -> Dict[str, Any]:
+        # The shared runtime is always up, so allocation never has to wait.
+        return self.allocate(user_signature)
+
     def allocate(self, user_signature: Dict[str, Any]) -> Dict[str, Any]:
         # Generate or use existing user ID
         user_id = user_signature.get("user_id")
@@ -27,6 +31,7 @@ class SimpleRuntimeAllocator:
         # based on user needs, load balancing, etc.
         return {
             "runtime_url": self.runtime_url,
+            "internal_url": self.runtime_url,
             "user_id": user_id,
             "features": features,
             "runtime_id": "runtime-01",  # Static for this POC
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Startup profile for the runtime service
+
+Per-user runtimes are started on demand, so runtime cold start is part of a
+user's first-page latency. This script reports:
+
+1. Import-time breakdown of the app module (via `python -X importtime`)
+2. Time-to-first-healthy-response: process spawn → first 200 from /health
+
+Budgets can be given so a regression fails the run (exit code 1).
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def import_breakdown(module: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+
+    Returns (total_us, self_us_by_package) where the total is the cumulative
+    import time of `module` and the breakdown sums self time per top-level
+    package, so e.g. every `fastapi.*` submodule is charged to `fastapi`.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        check=True,
+    )
+
+    total_us = 0
+    by_package: Dict[str, int] = defaultdict(int)
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        by_package[name.split(".")[0]] += int(self_us)
+        if name == module and len(indent) <= 1:
+            total_us = int(cumulative_us)
+
+    return total_us, dict(by_package)
+
+
+def time_to_first_healthy(
+    app: str,
+    port: int,
+    timeout: float = 30.0,
+    poll_interval: float = 0.01,
+) -> Optional[float]:
+    """
+    Spawn `uvicorn <app>` and poll /health until it answers 200.
+
+    Returns elapsed seconds from spawn, or None if it never became healthy.
+    """
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    proc = spawn_uvicorn(app, port)
+    try:
+        return wait_for_health(url, proc, start, timeout, poll_interval)
+    finally:
+        stop_process(proc)
+
+
+def spawn_uvicorn(app: str, port: int, env: Optional[Dict[str, str]] = None):
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", app,
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--log-level", "warning",
+        ],
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_for_health(
+    url: str,
+    proc: subprocess.Popen,
+    start: float,
+    timeout: float = 30.0,
+    poll_interval: float = 0.01,
+) -> Optional[float]:
+    while time.perf_counter() - start < timeout:
+        if proc.poll() is not None:
+            return None
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(poll_interval)
+    return None
+
+
+def stop_process(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def _median_ms(samples: List[float]) -> float:
+    return statistics.median(samples) * 1000.0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="runtime_app", help="module to import-profile")
+    parser.add_argument("--app", default="runtime_app:app", help="ASGI app for uvicorn")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--runs", type=int, default=3, help="samples per measurement")
+    parser.add_argument("--top", type=int, default=12, help="packages to list")
+    parser.add_argument("--import-budget-ms", type=float, default=None)
+    parser.add_argument("--health-budget-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    print(f"⏱  Startup profile for {args.app} ({args.runs} runs, median)")
+    print("=" * 60)
+
+    totals = []
+    breakdowns = []
+    for _ in range(args.runs):
+        total_us, by_package = import_breakdown(args.module)
+        totals.append(total_us / 1e6)
+        breakdowns.append(by_package)
+
+    import_ms = _median_ms(totals)
+    print(f"\nImport `{args.module}`: {import_ms:.1f} ms")
+    merged: Dict[str, List[int]] = defaultdict(list)
+    for by_package in breakdowns:
+        for package, self_us in by_package.items():
+            merged[package].append(self_us)
+    ranked = sorted(
+        ((statistics.median(v) / 1000.0, k) for k, v in merged.items()),
+        reverse=True,
+    )
+    for ms, package in ranked[: args.top]:
+        print(f"   {package:<28} {ms:8.1f} ms")
+
+    samples = []
+    for _ in range(args.runs):
+        elapsed = time_to_first_healthy(args.app, args.port)
+        if elapsed is None:
+            print(f"\n❌ {args.app} never answered /health")
+            return 1
+        samples.append(elapsed)
+
+    health_ms = _median_ms(samples)
+    print(f"\nTime to first healthy response: {health_ms:.1f} ms")
+
+    failed = False
+    if args.import_budget_ms is not None and import_ms > args.import_budget_ms:
+        print(f"❌ Import time {import_ms:.1f} ms exceeds budget {args.import_budget_ms:.1f} ms")
+        failed = True
+    if args.health_budget_ms is not None and health_ms > args.health_budget_ms:
+        print(f"❌ Time to healthy {health_ms:.1f} ms exceeds budget {args.health_budget_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print("✅ Within startup budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
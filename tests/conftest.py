@@ -0,0 +1,13 @@
+"""
+Shared fixtures.
+"""
+
+import pytest
+
+from tracing import get_default_exporter
+
+
+@pytest.fixture(autouse=True)
+def _trace_exporter_in_tmp_path(tmp_path, monkeypatch):
+    # Module-level tracers share the default exporter; keep its spans out of the tree
+    monkeypatch.setattr(get_default_exporter(), "path", str(tmp_path / "traces.jsonl"))
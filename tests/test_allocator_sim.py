@@ -0,0 +1,90 @@
+"""
+Allocator simulator: fake backend wiring and policy accounting.
+"""
+
+import random
+
+from allocator_sim import simulate, synthetic_trace
+from docker_allocator import DockerRuntimeAllocator, NoCapacityError
+from tracing import get_tracer
+
+
+def _trace(seed=7, **kwargs):
+    params = dict(users=200, visits=1000, duration=6 * 3600.0)
+    params.update(kwargs)
+    return list(synthetic_trace(rng=random.Random(seed), **params))
+
+
+def test_every_visit_is_allocated_and_cold_starts_match_new_runtimes():
+    trace = _trace()
+    report = simulate(trace, idle_ttl=10 * 3600.0, seed=1)
+    assert report["visits"] == len(trace)
+    assert report["failed_visits"] == 0
+    # nothing expires within the run, so each user starts exactly once
+    assert report["cold_starts"] == len({v["user_id"] for v in trace})
+    assert report["idle_evictions"] == report["cap_evictions"] == 0
+
+
+def test_short_ttl_and_cap_cause_evictions():
+    trace = _trace()
+    short = simulate(trace, idle_ttl=60.0, seed=1)
+    assert short["idle_evictions"] > 0
+
+    capped = simulate(trace, idle_ttl=10 * 3600.0, max_containers=20, seed=1)
+    assert capped["cap_evictions"] > 0
+
+
+def test_warm_pool_lowers_cold_start_latency():
+    trace = _trace()
+    cold = simulate(trace, seed=1)
+    warm = simulate(trace, warm_pool=10, seed=1)
+    assert warm["warm_pool_hits"] > 0
+    assert warm["cold_latency_p50"] < cold["cold_latency_p50"]
+
+
+def test_start_failures_are_retried():
+    report = simulate(_trace(), failure_rate=0.2, max_retries=5, seed=1)
+    assert report["start_failures"] > 0
+    assert report["failed_visits"] < report["start_failures"]
+
+
+def _burst(users, session=3600.0):
+    return [{"t": i * 0.01, "user_id": f"u{i}", "session": session} for i in range(users)]
+
+
+def test_caps_above_the_default_port_range_are_simulated():
+    report = simulate(_burst(1500), max_containers=2000, seed=1)
+    assert report["peak_runtimes"] == 1500
+    assert report["failed_visits"] == report["cap_evictions"] == 0
+
+    capped = simulate(_burst(1500), max_containers=1200, seed=1)
+    assert capped["peak_runtimes"] == 1200
+    assert capped["cap_evictions"] == 300
+
+
+def test_no_capacity_fails_visits_instead_of_crashing(monkeypatch):
+    def full(self):
+        raise NoCapacityError("full")
+
+    monkeypatch.setattr(DockerRuntimeAllocator, "_pick_host", full)
+    report = simulate(_burst(10), seed=1)
+    assert report["failed_visits"] == 10
+    assert report["cold_starts"] == 0
+
+
+def test_failed_visits_count_towards_latency():
+    # every start fails: the time spent retrying must show up in the tail
+    report = simulate(_burst(20), failure_rate=1.0, max_retries=2, retry_backoff=1.0, seed=1)
+    assert report["failed_visits"] == 20
+    assert report["latency_p50"] >= 1.0 + 2.0 + 4.0
+    assert report["failed_latency_p99"] == report["latency_p99"]
+
+
+def test_simulation_leaves_the_gateway_tracer_alone(monkeypatch):
+    gateway_tracer = get_tracer("gateway")
+    monkeypatch.setattr(gateway_tracer, "sample_rate", 1.0)
+    started = []
+    monkeypatch.setattr(gateway_tracer, "start_span", lambda *a, **k: started.append(a))
+    simulate(_trace(visits=50), idle_ttl=60.0, seed=1)
+    assert gateway_tracer.sample_rate == 1.0
+    assert started == []
@@ -0,0 +1,136 @@
+"""
+Gateway-managed host ports: bitmap allocator and its use by the Docker allocator.
+"""
+
+import docker
+import pytest
+
+import docker_allocator
+from port_allocator import HostPortAllocator, PortExhaustedError, load_port_range
+
+
+def test_claims_lowest_free_port_and_reuses_released():
+    ports = HostPortAllocator(9000, 4)
+    assert [ports.claim() for _ in range(3)] == [9000, 9001, 9002]
+    ports.release(9001)
+    assert ports.claim() == 9001
+    assert ports.claim() == 9003
+    with pytest.raises(PortExhaustedError):
+        ports.claim()
+    assert ports.claimed == 4
+
+
+def test_range_and_claimed_are_separate_questions():
+    ports = HostPortAllocator(9000, 4)
+    assert ports  # an empty allocator is still an allocator
+    assert ports.in_range(9001) and not ports.is_claimed(9001)
+    assert not ports.in_range(9004)
+    assert ports.claimed == 0
+
+
+def test_mark_claimed_rejects_out_of_range_and_duplicates():
+    ports = HostPortAllocator(9000, 4)
+    assert ports.mark_claimed(9002)
+    assert not ports.mark_claimed(9002)
+    assert not ports.mark_claimed(8999)
+    assert ports.claim() == 9000
+    assert ports.claim() == 9001
+    assert ports.claim() == 9003
+
+
+def test_load_port_range_reads_tool_spec(tmp_path, monkeypatch):
+    monkeypatch.delenv("RUNTIME_PORT_BASE", raising=False)
+    spec = tmp_path / "tool_spec.yaml"
+    spec.write_text('name: "x"\nport_base: 9000\nport_offset: 20\n')
+    assert load_port_range(str(spec), count=50) == (9020, 50)
+
+
+class _Container:
+    def __init__(self, container_id, labels):
+        self.id = container_id
+        self.labels = labels
+        self.status = "running"
+
+    def reload(self):
+        raise AssertionError("port should come from the label, not a reload")
+
+
+class _Containers:
+    def __init__(self, existing=()):
+        self.existing = list(existing)
+        self.run_calls = []
+
+    def list(self, all=False, filters=None):
+        label = filters["label"]
+        return [
+            c for c in self.existing
+            if label in {f"{k}={v}" for k, v in c.labels.items()}
+        ]
+
+    def run(self, image, **kwargs):
+        self.run_calls.append(kwargs)
+        container = _Container(f"c{len(self.run_calls)}", kwargs["labels"])
+        self.existing.append(container)
+        return container
+
+
+class _Client:
+    def __init__(self, existing=()):
+        self.containers = _Containers(existing)
+
+
+def _allocator(monkeypatch, client):
+    monkeypatch.setattr(docker, "from_env", lambda: client)
+    monkeypatch.setattr(docker_allocator.time, "sleep", lambda s: None)
+    return docker_allocator.DockerRuntimeAllocator(
+        base_host="localhost", ports=HostPortAllocator(9000, 10)
+    )
+
+
+def test_start_binds_claimed_port_and_rebuilds_from_labels(monkeypatch):
+    survivor = _Container("old", {"rbt.managed": "1", "rbt.user_id": "alice", "rbt.host_port": "9000"})
+    client = _Client([survivor])
+    allocator = _allocator(monkeypatch, client)
+    assert allocator.hosts["local"].ports.is_claimed(9000)
+
+    info = allocator.allocate({"user_id": "bob"})
+    assert info["runtime_url"] == "http://localhost:9001"
+    assert client.containers.run_calls[0]["ports"] == {"8001/tcp": 9001}
+
+    existing = allocator.allocate({"user_id": "alice"})
+    assert existing["runtime_url"] == "http://localhost:9000"
+
+
+def test_injected_port_range_is_used_even_when_empty(monkeypatch):
+    monkeypatch.setattr(docker_allocator.time, "sleep", lambda s: None)
+    client = _Client()
+    # An empty allocator has len() == 0; it must not be swapped for the default
+    allocator = docker_allocator.DockerRuntimeAllocator(
+        client=client, ports=HostPortAllocator(20000, 5000)
+    )
+    assert allocator.hosts["local"].capacity == 5000
+
+    info = allocator.allocate({"user_id": "bob"})
+    assert info["runtime_url"] == "http://localhost:20000"
+    assert client.containers.run_calls[0]["ports"] == {"8001/tcp": 20000}
+
+
+def test_proxy_only_runtimes_publish_no_host_port(monkeypatch):
+    monkeypatch.setattr(docker_allocator.time, "sleep", lambda s: None)
+    client = _Client()
+    allocator = docker_allocator.DockerRuntimeAllocator(
+        client=client,
+        ports=HostPortAllocator(9000, 10),
+        network="rbt",
+        publish_ports=False,
+    )
+
+    info = allocator.allocate({"user_id": "bob"})
+    assert info["host_port"] is None
+    assert info["runtime_url"] == info["internal_url"] == "http://rbt-runtime-bob:8001"
+    assert client.containers.run_calls[0]["ports"] is None
+    assert "rbt.host_port" not in client.containers.run_calls[0]["labels"]
+    assert allocator.hosts["local"].ports.claimed == 0
+
+    with pytest.raises(ValueError):
+        docker_allocator.DockerRuntimeAllocator(client=client, publish_ports=False)
@@ -0,0 +1,231 @@
+"""
+Proxy mode: /start streamed through the gateway, cookie-routed requests and
+WebSockets relayed to the runtime, and recovery from a bad routing cookie.
+"""
+
+import asyncio
+import importlib.util
+import json
+import socket
+import threading
+from pathlib import Path
+
+import httpx
+import pytest
+import websockets
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from security import create_nested_token, decode_nested_token
+from simple_allocator import SimpleRuntimeAllocator
+
+RUNTIME = "http://runtime-a:8001"
+
+upstream_app = FastAPI()
+
+
+@upstream_app.get("/start")
+async def start(token: str):
+    claims = decode_nested_token(token)
+    response = JSONResponse({"user_id": claims["user_id"]})
+    response.set_cookie("rbt_runtime_session", claims["user_id"])
+    return response
+
+
+@upstream_app.api_route("/echo", methods=["GET", "POST"])
+async def echo(request: Request):
+    response = JSONResponse(
+        {
+            "method": request.method,
+            "body": (await request.body()).decode(),
+            "query": request.url.query,
+            "x_forwarded_for": request.headers.get("x-forwarded-for"),
+        }
+    )
+    response.set_cookie("a", "1")
+    response.set_cookie("b", "2")
+    return response
+
+
+class _RuntimeNetwork(httpx.AsyncBaseTransport):
+    """runtime-a is served in-process; every other host is unreachable."""
+
+    def __init__(self):
+        self._runtime = httpx.ASGITransport(app=upstream_app)
+
+    async def handle_async_request(self, request):
+        if request.url.host == "runtime-a":
+            return await self._runtime.handle_async_request(request)
+        raise httpx.ConnectError("name does not resolve", request=request)
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    """A separate gateway_app module loaded with GATEWAY_MODE=proxy."""
+    monkeypatch.setenv("GATEWAY_MODE", "proxy")
+    monkeypatch.setenv("USE_DOCKER_ALLOCATOR", "false")
+    monkeypatch.setenv("RUNTIME_HOST", "runtime-a")
+    monkeypatch.setenv("RUNTIME_PORT", "8001")
+    path = Path(__file__).resolve().parent.parent / "gateway_app.py"
+    spec = importlib.util.spec_from_file_location("gateway_app_proxy", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.proxy._client = httpx.AsyncClient(transport=_RuntimeNetwork())
+    return module
+
+
+def _route_cookie(gateway, upstream, session="s1"):
+    return create_nested_token(
+        subject=gateway._session_user_id(session),
+        claims={"upstream": upstream},
+        lifetime_seconds=60,
+    )
+
+
+def _pin(client, gateway, upstream, session="s1"):
+    # domain matches what the gateway's own Set-Cookie uses, so it can be cleared
+    client.cookies.set("rbt_session", session, domain="testserver.local")
+    client.cookies.set(
+        "rbt_runtime", _route_cookie(gateway, upstream, session), domain="testserver.local"
+    )
+
+
+def test_entry_streams_start_and_sets_routing_cookie(gateway):
+    with TestClient(gateway.app) as client:
+        response = client.get("/", follow_redirects=False)
+        assert response.status_code == 200
+        assert response.json()["user_id"].startswith("user-")
+        assert decode_nested_token(client.cookies["rbt_runtime"])["upstream"] == RUNTIME
+        # the runtime's own cookie comes through next to the routing cookie
+        assert client.cookies["rbt_runtime_session"] == response.json()["user_id"]
+
+
+def test_cookie_routed_requests_keep_body_and_repeated_headers(gateway):
+    with TestClient(gateway.app) as client:
+        client.get("/")
+
+        got = client.get("/echo?x=1", headers={"X-Forwarded-For": "203.0.113.7"})
+        assert got.json()["method"] == "GET"
+        assert got.json()["query"] == "x=1"
+        assert got.json()["x_forwarded_for"] == "203.0.113.7, testclient"
+        assert len(got.headers.get_list("set-cookie")) == 2
+
+        posted = client.post("/echo", content=b"hello runtime")
+        assert posted.json() == {**posted.json(), "method": "POST", "body": "hello runtime"}
+        assert [c.split(";")[0] for c in posted.headers.get_list("set-cookie")] == ["a=1", "b=2"]
+
+
+def test_missing_or_forged_cookie_goes_back_to_entry(gateway):
+    with TestClient(gateway.app) as client:
+        missing = client.get("/echo", follow_redirects=False)
+        assert (missing.status_code, missing.headers["location"]) == (307, "/")
+
+        # / only accepts GET, so a POST must not be replayed there
+        posted = client.post("/echo", content=b"x", follow_redirects=False)
+        assert (posted.status_code, posted.headers["location"]) == (303, "/")
+
+        client.cookies.set("rbt_runtime", "forged")
+        forged = client.get("/echo", follow_redirects=False)
+        assert forged.status_code == 307
+        assert 'rbt_runtime=""' in forged.headers["set-cookie"]
+
+
+def test_released_runtime_clears_cookie_and_reallocates(gateway):
+    with TestClient(gateway.app) as client:
+        _pin(client, gateway, "http://gone:8001")
+        stale = client.get("/echo", follow_redirects=False)
+        assert (stale.status_code, stale.headers["location"]) == (307, "/")
+        assert "Max-Age=0" in stale.headers["set-cookie"]
+        assert "rbt_runtime" not in client.cookies
+
+        # followed through: / allocates again and pins the new runtime
+        _pin(client, gateway, "http://gone:8001")
+        assert client.get("/echo").json()["user_id"] == gateway._session_user_id("s1")
+        assert decode_nested_token(client.cookies["rbt_runtime"])["upstream"] == RUNTIME
+
+
+def test_routing_cookie_must_match_session_and_current_runtime(gateway):
+    with TestClient(gateway.app) as client:
+        _pin(client, gateway, RUNTIME)
+        assert client.get("/echo", follow_redirects=False).status_code == 200
+
+        # same cookie, other browser session: not routed
+        client.cookies.set("rbt_session", "s2", domain="testserver.local")
+        other = client.get("/echo", follow_redirects=False)
+        assert (other.status_code, other.headers["location"]) == (307, "/")
+        assert "Max-Age=0" in other.headers["set-cookie"]
+
+    # the user's runtime moved: the port in an old cookie may be someone else's now
+    gateway.allocator = SimpleRuntimeAllocator(runtime_url="http://runtime-b:8001")
+    with TestClient(gateway.app) as client:
+        _pin(client, gateway, RUNTIME)
+        moved = client.get("/echo", follow_redirects=False)
+        assert (moved.status_code, moved.headers["location"]) == (307, "/")
+
+
+@pytest.fixture
+def echo_server():
+    """A real WebSocket echo server; the relay connects with `websockets`."""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def echo(ws):
+        async for message in ws:
+            if message == "headers":
+                message = json.dumps(dict(ws.request.headers.raw_items()))
+            await ws.send(message)
+
+    async def serve():
+        async with websockets.serve(echo, "127.0.0.1", 0) as server:
+            state["port"] = server.sockets[0].getsockname()[1]
+            state["stop"] = loop.create_future()
+            started.set()
+            await state["stop"]
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True)
+    thread.start()
+    started.wait(5)
+    yield f"http://127.0.0.1:{state['port']}"
+    loop.call_soon_threadsafe(state["stop"].set_result, None)
+    thread.join(5)
+
+
+def test_websocket_is_relayed(gateway, echo_server):
+    gateway.allocator = SimpleRuntimeAllocator(runtime_url=echo_server)
+    with TestClient(gateway.app) as client:
+        _pin(client, gateway, echo_server)
+        with client.websocket_connect("/ws") as ws:
+            ws.send_text("ping")
+            assert ws.receive_text() == "ping"
+            ws.send_bytes(b"\x00\x01")
+            assert ws.receive_bytes() == b"\x00\x01"
+
+
+def test_websocket_handshake_carries_client_headers(gateway, echo_server):
+    gateway.allocator = SimpleRuntimeAllocator(runtime_url=echo_server)
+    with TestClient(gateway.app) as client:
+        _pin(client, gateway, echo_server)
+        with client.websocket_connect("/ws", headers={"Origin": "https://app.example"}) as ws:
+            ws.send_text("headers")
+            seen = {k.lower(): v for k, v in json.loads(ws.receive_text()).items()}
+    assert "rbt_session=s1" in seen["cookie"]
+    assert seen["origin"] == "https://app.example"
+    assert seen["x-forwarded-for"] == "testclient"
+    assert seen["x-forwarded-proto"] == "http"
+
+
+def test_unreachable_websocket_runtime_closes_and_clears_cookie(gateway):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed = f"http://127.0.0.1:{s.getsockname()[1]}"
+    gateway.allocator = SimpleRuntimeAllocator(runtime_url=closed)
+    with TestClient(gateway.app) as client:
+        _pin(client, gateway, closed)
+        with client.websocket_connect("/ws") as ws:
+            assert any(b"Max-Age=0" in v for k, v in ws.extra_headers if k == b"set-cookie")
+            with pytest.raises(WebSocketDisconnect) as closed_by:
+                ws.receive_text()
+        assert closed_by.value.code == 1013
@@ -0,0 +1,67 @@
+"""
+RuntimeRegistry: compact records and secondary indexes.
+"""
+
+from runtime_registry import RuntimeRecord, RuntimeRegistry
+
+
+def _info(user_id, features=("basic",), **extra):
+    return {
+        "user_id": user_id,
+        "container_id": f"c-{user_id}",
+        "runtime_url": f"http://localhost:9000/{user_id}",
+        "features": list(features),
+        **extra,
+    }
+
+
+def test_records_read_like_the_dicts_they_replace():
+    registry = RuntimeRegistry(clock=lambda: 1.0)
+    record = registry.set("u1", _info("u1", host_port=9001, node="a"))
+    assert isinstance(record, RuntimeRecord)
+    assert not hasattr(record, "__dict__")
+    assert record["runtime_url"] == "http://localhost:9000/u1"
+    assert record.get("internal_url") is None
+    assert record["node"] == "a"
+    assert dict(record)["features"] == ("basic",)
+    assert registry.get("u1") is record
+
+
+def test_secondary_indexes_follow_set_and_remove():
+    registry = RuntimeRegistry(clock=lambda: 1.0)
+    registry.set("u1", _info("u1"))
+    registry.set("u2", _info("u2", features=("basic", "advanced")))
+    registry.set("u3", _info("u3", features=("basic", "advanced")))
+
+    assert registry.by_container_id("c-u2")["user_id"] == "u2"
+    assert registry.by_runtime_url("http://localhost:9000/u3")["user_id"] == "u3"
+    assert [r.user_id for r in registry.with_features(["basic", "advanced"])] == ["u2", "u3"]
+
+    registry.set("u2", _info("u2", container_id="c-new"))
+    assert registry.by_container_id("c-u2") is None
+    assert [r.user_id for r in registry.with_features(["basic", "advanced"])] == ["u3"]
+
+    registry.remove("u3")
+    assert registry.by_runtime_url("http://localhost:9000/u3") is None
+    assert list(registry.with_features(["basic", "advanced"])) == []
+    assert len(registry) == 2
+
+
+def test_activity_order_and_idle_lookup():
+    now = [0.0]
+    registry = RuntimeRegistry(clock=lambda: now[0])
+    for i, user_id in enumerate(["u1", "u2", "u3"]):
+        now[0] = float(i)
+        registry.set(user_id, _info(user_id))
+
+    now[0] = 10.0
+    registry.touch("u1")
+    assert registry.least_recently_active().user_id == "u2"
+    assert [r.user_id for r in registry.idle_since(5.0)] == ["u2", "u3"]
+
+
+def test_all_is_a_view_not_a_copy():
+    registry = RuntimeRegistry()
+    view = registry.all()
+    registry.set("u1", _info("u1"))
+    assert [r.user_id for r in view] == ["u1"]
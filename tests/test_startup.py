@@ -0,0 +1,47 @@
+"""
+Cold-start guards for the runtime service.
+
+Importing runtime_app must not pull in the token crypto stack or generate a
+Fernet key; those belong to the first /start request.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _modules_after_import(module):
+    code = f"import sys, {module}; print(' '.join(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_ROOT,
+    )
+    return set(result.stdout.split())
+
+
+def test_runtime_app_defers_crypto_imports():
+    loaded = _modules_after_import("runtime_app")
+    assert "jwt" not in loaded
+    assert "cryptography" not in loaded
+    assert "security" not in loaded
+
+
+def test_security_import_is_lazy():
+    loaded = _modules_after_import("security")
+    assert "jwt" not in loaded
+    assert "cryptography" not in loaded
+
+
+def test_token_round_trip_after_lazy_init():
+    from security import create_nested_token, decode_nested_token
+
+    token = create_nested_token("user-1", {"features": ["basic"]}, lifetime_seconds=60)
+    claims = decode_nested_token(token)
+    assert claims["sub"] == "user-1"
+    assert claims["features"] == ["basic"]
@@ -0,0 +1,91 @@
+"""
+Tracing: context propagation through the token and the non-blocking exporter.
+"""
+
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from fastapi.testclient import TestClient
+
+import gateway_app
+import runtime_app
+from tracing import QueueExporter, SpanContext, Tracer
+
+
+def _read_spans(exporter):
+    exporter.shutdown()
+    with open(exporter.path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_traceparent_round_trip():
+    context = SpanContext("a" * 32, "b" * 16, True)
+    parsed = SpanContext.from_traceparent(context.to_traceparent())
+    assert (parsed.trace_id, parsed.span_id, parsed.sampled) == ("a" * 32, "b" * 16, True)
+    assert SpanContext.from_traceparent("garbage") is None
+
+
+def test_children_inherit_head_sampling_decision(tmp_path):
+    exporter = QueueExporter(path=str(tmp_path / "spans.jsonl"))
+    tracer = Tracer("test", exporter=exporter, sample_rate=0.0)
+    with tracer.start_span("root") as root:
+        child = tracer.start_span("child")
+    assert not root.context.sampled
+    assert not child.context.sampled
+    assert child.context.trace_id == root.context.trace_id
+    assert exporter._thread is None  # nothing was exported
+
+
+def test_exporter_drops_instead_of_blocking(tmp_path):
+    exporter = QueueExporter(path=str(tmp_path / "spans.jsonl"), max_queue=1)
+    exporter._thread = object()  # pretend the writer is running but stalled
+    exporter.export({"n": 1})
+    exporter.export({"n": 2})
+    assert exporter.dropped == 1
+
+
+def test_runtime_spans_join_gateway_trace(tmp_path, monkeypatch):
+    exporter = QueueExporter(path=str(tmp_path / "spans.jsonl"))
+    monkeypatch.setattr(gateway_app.tracer, "exporter", exporter)
+    monkeypatch.setattr(gateway_app.tracer, "sample_rate", 1.0)
+    monkeypatch.setattr(runtime_app.tracer, "exporter", exporter)
+
+    gateway = TestClient(gateway_app.app)
+    response = gateway.get("/", follow_redirects=False)
+    assert response.status_code == 307
+    token = parse_qs(urlparse(response.headers["location"]).query)["token"][0]
+
+    runtime = TestClient(runtime_app.app)
+    assert runtime.get("/start", params={"token": token}).status_code == 200
+
+    spans = {span["name"]: span for span in _read_spans(exporter)}
+    entry = spans["gateway.entry"]
+    assert spans["runtime.start"]["parent_id"] == entry["span_id"]
+    assert {span["trace_id"] for span in spans.values()} == {entry["trace_id"]}
+    assert spans["runtime.decode_token"]["parent_id"] == spans["runtime.start"]["span_id"]
+
+
+def test_unserialisable_attributes_do_not_stop_the_writer(tmp_path):
+    exporter = QueueExporter(path=str(tmp_path / "spans.jsonl"), flush_interval=0.01)
+    tracer = Tracer("test", exporter=exporter, sample_rate=1.0)
+    with tracer.start_span("odd") as span:
+        span.set_attribute("obj", object())
+    exporter.export({("tuple", "key"): 1})  # fails even with default=str
+    time.sleep(0.1)
+    with tracer.start_span("after"):
+        pass
+    names = [span["name"] for span in _read_spans(exporter)]
+    assert names == ["odd", "after"]
+    assert exporter.dropped == 1
+
+
+def test_shutdown_does_not_block_on_a_full_queue(tmp_path):
+    exporter = QueueExporter(path=str(tmp_path / "spans.jsonl"), max_queue=1)
+    exporter._thread = threading.Thread(target=threading.Event().wait, args=(5,), daemon=True)
+    exporter._thread.start()  # a writer that never drains
+    exporter.export({"n": 1})
+    started = time.monotonic()
+    exporter.shutdown(timeout=0.1)
+    assert time.monotonic() - started < 1.0
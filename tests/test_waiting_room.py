@@ -0,0 +1,182 @@
+"""
+Async allocation: / answers before the runtime is up, /wait reports
+readiness, /wait/forward mints the token.
+"""
+
+import threading
+from concurrent.futures import Future
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi.testclient import TestClient
+
+import gateway_app
+from allocator_sim import FakeDockerClient
+from docker_allocator import DockerRuntimeAllocator
+from port_allocator import HostPortAllocator
+from security import decode_nested_token
+from tracing import Tracer
+from waiting_room import Ticket, WaitingRoom
+
+
+class SlowAllocator:
+    """Runtime is never ready up front; allocation blocks until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def peek(self, user_signature):
+        return None
+
+    def allocate(self, user_signature):
+        self.release.wait(5)
+        return {
+            "runtime_url": "http://runtime-1:8001",
+            "user_id": "user-1",
+            "features": ["basic"],
+            "container_id": "c-1",
+        }
+
+
+@pytest.fixture
+def slow(monkeypatch):
+    allocator = SlowAllocator()
+    monkeypatch.setattr(gateway_app, "allocator", allocator)
+    yield allocator
+    allocator.release.set()
+
+
+def _ticket(response):
+    return parse_qs(urlparse(response.headers["location"]).query)["ticket"][0]
+
+
+def test_entry_does_not_wait_for_allocation(slow):
+    with TestClient(gateway_app.app) as client:
+        response = client.get("/", follow_redirects=False)
+        assert response.status_code == 303
+        ticket = _ticket(response)
+
+        assert client.get("/wait", params={"ticket": ticket}).status_code == 200
+        pending = client.get("/wait/status", params={"ticket": ticket}).json()
+        assert pending["state"] == "pending"
+        early = client.get("/wait/forward", params={"ticket": ticket}, follow_redirects=False)
+        assert early.headers["location"] == f"/wait?ticket={ticket}"
+
+        slow.release.set()
+        ready = client.get("/wait/status", params={"ticket": ticket, "timeout": 5}).json()
+        assert ready["state"] == "ready"
+        assert ready["time_to_ready_ms"] >= 0
+
+        forwarded = client.get("/wait/forward", params={"ticket": ticket}, follow_redirects=False)
+        assert forwarded.status_code == 307
+        location = urlparse(forwarded.headers["location"])
+        assert location.netloc == "runtime-1:8001"
+        claims = decode_nested_token(parse_qs(location.query)["token"][0])
+        assert claims["user_id"] == "user-1"
+
+
+def test_sse_reports_ready(slow):
+    with TestClient(gateway_app.app) as client:
+        ticket = _ticket(client.get("/", follow_redirects=False))
+        slow.release.set()
+        with client.stream("GET", "/wait/events", params={"ticket": ticket}) as response:
+            body = "".join(response.iter_text())
+        assert "event: ready" in body
+
+
+def test_ticket_only_serves_the_session_it_was_issued_to(slow):
+    with TestClient(gateway_app.app) as client:
+        ticket = _ticket(client.get("/", follow_redirects=False))
+        slow.release.set()
+        client.get("/wait/status", params={"ticket": ticket, "timeout": 5})
+
+    # a leaked ticket id is not enough to pick up someone else's runtime
+    with TestClient(gateway_app.app) as other:
+        for path in ("/wait", "/wait/forward"):
+            response = other.get(path, params={"ticket": ticket}, follow_redirects=False)
+            assert (response.status_code, response.headers["location"]) == (303, "/")
+        for path in ("/wait/status", "/wait/events"):
+            response = other.get(path, params={"ticket": ticket})
+            assert (response.status_code, response.json()["state"]) == (404, "unknown")
+
+        other.cookies.set("rbt_session", "someone-else")
+        forwarded = other.get("/wait/forward", params={"ticket": ticket}, follow_redirects=False)
+        assert forwarded.headers["location"] == "/"
+
+
+def test_unknown_ticket_goes_back_to_entry():
+    with TestClient(gateway_app.app) as client:
+        response = client.get("/wait", params={"ticket": "nope"}, follow_redirects=False)
+        assert response.headers["location"] == "/"
+
+
+def test_failed_ticket_hides_the_error_and_logs_it(caplog):
+    def boom():
+        raise RuntimeError("docker socket at /var/run/docker.sock refused")
+
+    room = WaitingRoom(Tracer("test", sample_rate=0.0))
+    ticket = room.submit(boom)
+    with pytest.raises(RuntimeError):
+        ticket.future.result(5)
+    room._executor.shutdown(wait=True)  # done callbacks have run
+
+    assert ticket.status()["state"] == "failed"
+    assert "docker.sock" not in ticket.status()["error"]
+    assert "docker.sock" in caplog.text
+
+
+def test_cancelled_ticket_reports_failed():
+    future = Future()
+    future.cancel()
+    ticket = Ticket("t", None, future, None)
+    assert ticket.state == "failed"
+    assert ticket.status()["error"]
+
+
+@pytest.fixture
+def docker_backend(monkeypatch):
+    """The real Docker allocator on a fake daemon whose starts block until released."""
+    backend = FakeDockerClient(start_latency=0.0, start_jitter=0.0)
+    backend.release = threading.Event()
+    run = backend.containers.run
+
+    def blocking_run(*args, **kwargs):
+        backend.release.wait(5)
+        return run(*args, **kwargs)
+
+    backend.containers.run = blocking_run
+    allocator = DockerRuntimeAllocator(
+        client=backend, ports=HostPortAllocator(9000, 10), boot_wait=0
+    )
+    monkeypatch.setattr(gateway_app, "allocator", allocator)
+    yield backend
+    backend.release.set()
+
+
+def test_refresh_joins_the_pending_ticket(docker_backend):
+    with TestClient(gateway_app.app) as client:
+        first = client.get("/", follow_redirects=False)
+        assert first.cookies.get("rbt_session")
+        second = client.get("/", follow_redirects=False)
+        assert _ticket(second) == _ticket(first)
+        assert "rbt_session" not in second.cookies  # session was reused
+
+        docker_backend.release.set()
+        client.get("/wait/status", params={"ticket": _ticket(first), "timeout": 5})
+        assert docker_backend.starts == 1
+
+
+def test_returning_user_skips_the_waiting_room(docker_backend):
+    docker_backend.release.set()
+    with TestClient(gateway_app.app) as client:
+        ticket = _ticket(client.get("/", follow_redirects=False))
+        client.get("/wait/status", params={"ticket": ticket, "timeout": 5})
+
+        again = client.get("/", follow_redirects=False)
+        assert again.status_code == 307
+        assert urlparse(again.headers["location"]).netloc == "localhost:9000"
+        assert docker_backend.starts == 1
+
+    # another browser gets its own runtime
+    with TestClient(gateway_app.app) as other:
+        assert other.get("/", follow_redirects=False).status_code == 303
@@ -0,0 +1,304 @@
+# tracing.py
+"""
+Minimal tracing for the gateway → runtime hop.
+
+- Trace context is a W3C `traceparent` string, carried inside the nested
+  token claims so it survives the redirect.
+- Sampling is decided once at the head (the gateway) and inherited by every
+  child span, including the runtime's.
+- Finished spans are handed to a queue and written by a background thread;
+  request handlers never block on I/O. When the queue is full spans are
+  dropped and counted rather than slowing requests down.
+
+Stdlib only, so importing it does not hurt runtime cold start.
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0.1"))
+# Outside the working directory, so running from a checkout never writes into it
+TRACE_EXPORT_PATH = os.environ.get(
+    "TRACE_EXPORT_PATH", os.path.join(tempfile.gettempdir(), "rbt-traces.jsonl")
+)
+TRACE_QUEUE_SIZE = int(os.environ.get("TRACE_QUEUE_SIZE", "10000"))
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class SpanContext:
+    """The part of a span that crosses process boundaries."""
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def to_traceparent(self) -> str:
+        flags = "01" if self.sampled else "00"
+        return f"00-{self.trace_id}-{self.span_id}-{flags}"
+
+    @classmethod
+    def from_traceparent(cls, value: Optional[str]) -> Optional["SpanContext"]:
+        if not value:
+            return None
+        parts = value.split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            sampled = bool(int(parts[3], 16) & 0x01)
+        except ValueError:
+            return None
+        return cls(parts[1], parts[2], sampled)
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    """
+    A timed operation. Use as a context manager to make it the current span
+    for the enclosed code, or call end() explicitly.
+
+    Unsampled spans still carry a context (so the sampling decision
+    propagates) but record nothing.
+    """
+
+    __slots__ = (
+        "tracer", "name", "context", "parent_id",
+        "start_ns", "end_ns", "attributes", "_token",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        start_ns: int,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes if context.sampled else None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        if self.context.sampled:
+            if self.attributes is None:
+                self.attributes = {}
+            self.attributes[key] = value
+
+    def end(self, end_ns: Optional[int] = None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = end_ns or time.time_ns()
+        if self.context.sampled:
+            self.tracer.exporter.export(self._to_record())
+
+    def _to_record(self) -> Dict[str, Any]:
+        return {
+            "service": self.tracer.service,
+            "name": self.name,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes or {},
+        }
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.set_attribute("error", f"{exc_type.__name__}: {exc}")
+        _current_span.reset(self._token)
+        self.end()
+        return False
+
+
+class QueueExporter:
+    """
+    Non-blocking span exporter.
+
+    export() only enqueues; a daemon thread drains the queue in batches and
+    appends JSON lines to `path` (a local stand-in for a collector).
+    """
+
+    def __init__(
+        self,
+        path: str = TRACE_EXPORT_PATH,
+        max_queue: int = TRACE_QUEUE_SIZE,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict[str, Any]):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def shutdown(self, timeout: float = 5.0):
+        """Flush what is queued and stop the writer thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._thread = None
+        if not thread.is_alive():
+            return
+        # Never block exit on a full queue: what does not fit is dropped
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="trace-exporter", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            stop = first is None
+            if not stop:
+                batch.append(first)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        # Failures drop spans, never the writer thread
+        lines = []
+        for record in batch:
+            try:
+                lines.append(json.dumps(record, default=str) + "\n")
+            except Exception:
+                self.dropped += 1
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+        except Exception:
+            self.dropped += len(lines)
+
+
+class Tracer:
+    """
+    Creates spans for one service.
+
+    A span with no explicit parent is a child of the current span; with
+    neither it starts a new trace and makes the head sampling decision.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        exporter: Optional[QueueExporter] = None,
+        sample_rate: float = TRACE_SAMPLE_RATE,
+    ):
+        self.service = service
+        self.exporter = exporter or get_default_exporter()
+        self.sample_rate = sample_rate
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        start_ns: Optional[int] = None,
+    ) -> Span:
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+
+        if parent is None:
+            context = SpanContext(
+                _new_trace_id(), _new_span_id(), random.random() < self.sample_rate
+            )
+            parent_id = None
+        else:
+            context = SpanContext(parent.trace_id, _new_span_id(), parent.sampled)
+            parent_id = parent.span_id
+
+        return Span(
+            self, name, context, parent_id, start_ns or time.time_ns(), attributes
+        )
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+_default_exporter: Optional[QueueExporter] = None
+
+
+def get_default_exporter() -> QueueExporter:
+    global _default_exporter
+    if _default_exporter is None:
+        _default_exporter = QueueExporter()
+    return _default_exporter
+
+
+_tracers: Dict[str, Tracer] = {}
+
+
+def get_tracer(service: str) -> Tracer:
+    tracer = _tracers.get(service)
+    if tracer is None:
+        tracer = _tracers[service] = Tracer(service)
+    return tracer
@@ -0,0 +1,151 @@
+# waiting_room.py
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from uuid import uuid4
+
+from tracing import SpanContext, Tracer
+
+logger = logging.getLogger(__name__)
+
+# Shown to the browser; the real exception only goes to the log
+FAILED_MESSAGE = "the runtime could not be started"
+
+
+class Ticket:
+    """One background allocation the browser is waiting on."""
+
+    __slots__ = ("id", "key", "future", "created_at", "ready_at", "trace_context")
+
+    def __init__(self, ticket_id: str, key: Optional[str], future: Future, trace_context: SpanContext):
+        self.id = ticket_id
+        self.key = key
+        self.future = future
+        self.created_at = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.trace_context = trace_context
+
+    @property
+    def state(self) -> str:
+        if not self.future.done():
+            return "pending"
+        # exception() raises on a cancelled future (executor shut down)
+        if self.future.cancelled() or self.future.exception() is not None:
+            return "failed"
+        return "ready"
+
+    @property
+    def time_to_ready(self) -> Optional[float]:
+        if self.ready_at is None:
+            return None
+        return self.ready_at - self.created_at
+
+    def status(self) -> Dict[str, Any]:
+        status = {"ticket": self.id, "state": self.state}
+        if self.time_to_ready is not None:
+            status["time_to_ready_ms"] = round(self.time_to_ready * 1000.0, 1)
+        if status["state"] == "failed":
+            status["error"] = FAILED_MESSAGE
+        return status
+
+
+class WaitingRoom:
+    """
+    Runs blocking allocations off the request path.
+
+    The gateway answers immediately with a ticket; the browser waits on a
+    lightweight page that learns readiness over SSE or long-poll. Tickets
+    live in memory, so like RuntimeRegistry this needs a shared store (and
+    sticky tickets) before running more than one gateway process.
+    """
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        max_workers: int = 8,
+        ticket_ttl: float = 600.0,
+    ):
+        self.tracer = tracer
+        self.ticket_ttl = ticket_ttl
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tickets: Dict[str, Ticket] = {}
+        self._by_key: Dict[str, Ticket] = {}
+
+    def submit(self, fn: Callable[..., Any], *args, key: Optional[str] = None) -> Ticket:
+        """
+        Start `fn(*args)` in the background and return its ticket.
+
+        With a `key` (e.g. a known user_id) a second submit while the first
+        is still pending returns the existing ticket instead of allocating
+        twice.
+        """
+        self._expire()
+        if key is not None:
+            existing = self._by_key.get(key)
+            if existing is not None and existing.state == "pending":
+                return existing
+
+        # time_to_ready covers queueing + allocation; allocator spans nest under it
+        span = self.tracer.start_span("gateway.time_to_ready")
+        context = contextvars.copy_context()
+
+        def run():
+            with span:
+                return fn(*args)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="allocate"
+            )
+        future = self._executor.submit(context.run, run)
+        ticket = Ticket(uuid4().hex, key, future, span.context)
+        future.add_done_callback(lambda _: self._done(ticket))
+        self._tickets[ticket.id] = ticket
+        if key is not None:
+            self._by_key[key] = ticket
+        return ticket
+
+    def _done(self, ticket: Ticket):
+        ticket.ready_at = time.monotonic()
+        if not ticket.future.cancelled() and ticket.future.exception() is not None:
+            logger.error(
+                "allocation for ticket %s failed", ticket.id, exc_info=ticket.future.exception()
+            )
+
+    def get(self, ticket_id: str) -> Optional[Ticket]:
+        return self._tickets.get(ticket_id)
+
+    async def wait(self, ticket: Ticket, timeout: float) -> bool:
+        """Wait up to `timeout` seconds; True once the ticket is done."""
+        if ticket.future.done():
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(ticket.future)), timeout)
+        except asyncio.TimeoutError:
+            return False
+        except Exception:
+            pass  # failure is reported through ticket.state
+        return True
+
+    def discard(self, ticket: Ticket):
+        self._tickets.pop(ticket.id, None)
+        if ticket.key is not None and self._by_key.get(ticket.key) is ticket:
+            del self._by_key[ticket.key]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _expire(self):
+        # Tickets are stored in creation order, so only the head is checked
+        cutoff = time.monotonic() - self.ticket_ttl
+        while self._tickets:
+            oldest = next(iter(self._tickets.values()))
+            if oldest.created_at >= cutoff or not oldest.future.done():
+                return
+            self.discard(oldest)